@@ -15,23 +15,124 @@ Features:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Any
+import asyncpg
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
-from dataclasses import dataclass, asdict
+from array import array
+from dataclasses import dataclass, asdict, field, fields, replace
 from enum import Enum
-import smtplib
+import aiosmtplib
+import orjson
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import socket
+from concurrent.futures import ThreadPoolExecutor
+
+# Numba JIT-compiles the node aggregation for large clusters; without it the
+# same code runs as plain Python
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+
+    def njit(**kwargs):
+        return lambda func: func
+
+
+_UTC = timezone.utc
+
+# Pool key for the pg_auto_failover monitor connection
+_MONITOR_POOL = '__monitor__'
+
+# Channel on which the pg_auto_failover monitor notifies node state changes
+_STATE_CHANNEL = 'state'
+
+# Errors after which pooled connections are dropped and reopened
+_CONNECTION_ERRORS = (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError)
+
+
+# Replication statistics of the walsenders on a node; the current LSN comes
+# from the receive position when the node is itself a standby
+_REPLICATION_STATS_SQL = """
+    SELECT
+        application_name,
+        client_addr,
+        client_hostname,
+        state,
+        sync_state,
+        pg_wal_lsn_diff(
+            CASE WHEN pg_is_in_recovery() THEN pg_last_wal_receive_lsn() ELSE pg_current_wal_lsn() END,
+            replay_lsn
+        ) as replay_lag_bytes,
+        pg_wal_lsn_diff(
+            CASE WHEN pg_is_in_recovery() THEN pg_last_wal_receive_lsn() ELSE pg_current_wal_lsn() END,
+            flush_lsn
+        ) as receive_lag_bytes,
+        extract(epoch from write_lag) as receive_lag_seconds,
+        extract(epoch from replay_lag) as replay_lag_seconds,
+        backend_start
+    FROM pg_stat_replication
+"""
+
+# Version, recovery state, replay backlog and replication stats of a node
+_NODE_PROBE_SQL = f"""
+    SELECT
+        version() as version,
+        pg_is_in_recovery() as in_recovery,
+        pg_wal_lsn_diff(
+            pg_last_wal_receive_lsn(),
+            pg_last_wal_replay_lsn()
+        )::bigint as replay_backlog_bytes,
+        (SELECT json_agg(r) FROM ({_REPLICATION_STATS_SQL}) r) as replication_stats
+"""
+
+# Liveness probe: an empty query round-trips to the server without being
+# parsed or planned, so it is cheaper than even a prepared SELECT 1
+_LIVENESS_SQL = ";"
+
+# Nodes and formation from the monitor as a single JSON document
+_CLUSTER_STATE_SQL = """
+    SELECT json_build_object(
+        'nodes', COALESCE((
+            SELECT json_agg(n ORDER BY n.nodeid)
+            FROM (
+                SELECT nodeid, nodename, nodehost, nodeport,
+                       reportedstate, health, reportedlsn,
+                       goalstate,
+                       -- epoch seconds; JSON timestamps trim trailing
+                       -- fractional zeros, which fromisoformat() rejects
+                       -- before Python 3.11
+                       extract(epoch from statechangetime) as statechangetime
+                FROM pgautofailover.node
+            ) n
+        ), '[]'::json),
+        'formation', (
+            SELECT row_to_json(f)
+            FROM (
+                SELECT name, kind, number_sync_standbys
+                FROM pgautofailover.formation
+                LIMIT 1
+            ) f
+        )
+    )
+"""
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values orjson does not handle natively"""
+    if isinstance(value, array):
+        return value.tolist()
+    return str(value)
 
 
 class NodeState(Enum):
@@ -49,6 +150,47 @@ class HealthStatus(Enum):
     UNKNOWN = 0
 
 
+# Enum members by value, for lookups without Enum.__call__ and its ValueError
+_STATE_BY_CODE = {state.value: state for state in NodeState}
+_HEALTH_BY_CODE = {health.value: health for health in HealthStatus}
+
+# pg_auto_failover reports node states as text labels ('primary', 'secondary', ...)
+_STATE_BY_LABEL = {state.name.lower(): state for state in NodeState}
+
+
+_PRIMARY_CODE = NodeState.PRIMARY.value
+_SECONDARY_CODE = NodeState.SECONDARY.value
+_WAIT_STANDBY_CODE = NodeState.WAIT_STANDBY.value
+_UNHEALTHY_CODE = HealthStatus.UNHEALTHY.value
+
+
+@njit(cache=True)
+def _aggregate(state_codes, health_codes, lags) -> Tuple[int, int, int, int]:
+    """Return (primary_count, replica_count, unhealthy_nodes, max_lag) for the node columns"""
+    primary_count = 0
+    replica_count = 0
+    unhealthy_nodes = 0
+    max_lag = 0  # unknown lags are stored as -1, so they never win
+    for i in range(len(state_codes)):
+        state_code = state_codes[i]
+        if state_code == _PRIMARY_CODE:
+            primary_count += 1
+        elif state_code == _SECONDARY_CODE or state_code == _WAIT_STANDBY_CODE:
+            replica_count += 1
+        if health_codes[i] == _UNHEALTHY_CODE:
+            unhealthy_nodes += 1
+        if lags[i] > max_lag:
+            max_lag = lags[i]
+    return primary_count, replica_count, unhealthy_nodes, max_lag
+
+
+def _as_int64_columns(*columns):
+    """Convert node columns to int64 ndarrays for _aggregate when NumPy is available"""
+    if np is None:
+        return columns
+    return tuple(np.asarray(column, dtype=np.int64) for column in columns)
+
+
 @dataclass
 class NodeInfo:
     """Information about a PostgreSQL node"""
@@ -66,15 +208,38 @@ class NodeInfo:
 
 @dataclass
 class ClusterHealth:
-    """Overall cluster health status"""
+    """Overall cluster health status, with per-node data stored column-wise"""
     timestamp: datetime
-    nodes: List[NodeInfo]
     primary_count: int
     replica_count: int
     unhealthy_nodes: int
     max_replication_lag: Optional[int]
     failover_ready: bool
     issues: List[str]
+    names: List[str] = field(default_factory=list)
+    hostnames: List[str] = field(default_factory=list)
+    ports: array = field(default_factory=lambda: array('i'))
+    roles: List[str] = field(default_factory=list)
+    states: array = field(default_factory=lambda: array('b'))  # NodeState values
+    healths: array = field(default_factory=lambda: array('b'))  # HealthStatus values
+    lags: array = field(default_factory=lambda: array('q'))  # -1 when unknown
+    last_seens: List[Optional[float]] = field(default_factory=list)  # epoch seconds
+
+    def iter_nodes(self) -> Iterator[NodeInfo]:
+        """Materialize NodeInfo records from the node columns"""
+        for name, hostname, port, role, state, health, lag, last_seen in zip(
+                self.names, self.hostnames, self.ports, self.roles,
+                self.states, self.healths, self.lags, self.last_seens):
+            yield NodeInfo(
+                name=name,
+                hostname=hostname,
+                port=port,
+                role=role,
+                state=_STATE_BY_CODE[state],
+                health=_HEALTH_BY_CODE[health],
+                replication_lag=lag if lag >= 0 else None,
+                last_seen=datetime.fromtimestamp(last_seen, _UTC) if last_seen is not None else None
+            )
 
 
 @dataclass
@@ -88,64 +253,193 @@ class AlertRule:
     cooldown_minutes: int = 5
 
 
+# Built-in alert rules; the replication lag threshold is filled in from config
+ALERT_RULES = (
+    AlertRule(
+        name="no_primary",
+        condition="primary_count == 0",
+        threshold=0,
+        severity="critical"
+    ),
+    AlertRule(
+        name="multiple_primaries",
+        condition="primary_count > 1",
+        threshold=1,
+        severity="critical"
+    ),
+    AlertRule(
+        name="unhealthy_nodes",
+        condition="unhealthy_nodes > 0",
+        threshold=0,
+        severity="warning"
+    ),
+    AlertRule(
+        name="high_replication_lag",
+        condition="max_replication_lag is not None",
+        threshold=0,
+        severity="warning"
+    ),
+    AlertRule(
+        name="failover_not_ready",
+        condition="not failover_ready",
+        threshold=0,
+        severity="info"
+    )
+)
+
+# Rank of each alert severity; custom severities rank as warnings
+_SEVERITY_RANK = {'info': 0, 'warning': 1, 'critical': 2}
+
+# Condition evaluated for each alert rule, keyed by rule name
+_ALERT_PREDICATES = {
+    'no_primary': lambda health, threshold: health.primary_count == 0,
+    'multiple_primaries': lambda health, threshold: health.primary_count > 1,
+    'unhealthy_nodes': lambda health, threshold: health.unhealthy_nodes > 0,
+    'high_replication_lag': lambda health, threshold: (
+        health.max_replication_lag is not None and
+        health.max_replication_lag > threshold
+    ),
+    'failover_not_ready': lambda health, threshold: not health.failover_ready,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseConfig:
+    """pg_auto_failover monitor and node credentials"""
+    monitor_host: str = 'localhost'
+    monitor_port: int = 5431
+    monitor_database: str = 'pg_auto_failover'
+    monitor_user: str = 'autoctl_node'
+    monitor_password: str = 'autoctl_node'
+    postgres_user: str = 'postgres'
+    postgres_password: str = 'postgres_password'
+
+
+@dataclass(frozen=True, slots=True)
+class NodeConfig:
+    """Connection address of a PostgreSQL node"""
+    host: str = 'localhost'
+    port: int = 5432
+
+
+@dataclass(frozen=True, slots=True)
+class ThresholdsConfig:
+    """Monitoring thresholds and intervals"""
+    max_replication_lag_bytes: int = 1000000  # 1MB
+    connection_timeout_seconds: float = 5
+    connection_probe_idle_seconds: float = 30
+    health_check_interval_seconds: float = 30
+    heartbeat_interval_seconds: float = 60
+    cluster_state_cache_seconds: float = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class EmailConfig:
+    """SMTP settings for email alerts"""
+    smtp_server: str = 'localhost'
+    smtp_port: int = 587
+    smtp_username: str = ''
+    smtp_password: str = ''
+    from_email: str = 'monitor@example.com'
+    to_emails: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class AlertingConfig:
+    """Alert delivery channels"""
+    email: EmailConfig = field(default_factory=EmailConfig)
+    webhook_urls: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class MonitorConfig:
+    """Monitor configuration, resolved once from the YAML file"""
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    nodes: Mapping[str, NodeConfig] = field(default_factory=lambda: MappingProxyType({
+        'primary': NodeConfig(port=5432),
+        'replica1': NodeConfig(port=5433),
+        'replica2': NodeConfig(port=5434),
+    }))
+    thresholds: ThresholdsConfig = field(default_factory=ThresholdsConfig)
+    alerting: AlertingConfig = field(default_factory=AlertingConfig)
+
+
+def _config_section(cls, values: Optional[Dict[str, Any]], **overrides):
+    """Build a config dataclass from a YAML mapping, ignoring keys it does not define"""
+    names = {f.name for f in fields(cls)}
+    kwargs = {key: value for key, value in (values or {}).items() if key in names}
+    kwargs.update(overrides)
+    return cls(**kwargs)
+
+
 class PGHAMonitor:
     """Main PostgreSQL HA monitoring class"""
 
     def __init__(self, config_path: str = "monitoring/config.yaml"):
-        self.config = self._load_config(config_path)
         self.logger = self._setup_logging()
-        self.alert_history: Dict[str, datetime] = {}
-        self.monitor_connection = None
-        self.node_connections: Dict[str, psycopg2.connection] = {}
+        self.config = self._load_config(config_path)
+        self.alert_history: Dict[str, float] = {}  # rule name -> time.monotonic() of last alert
+        self._pools: Dict[str, asyncpg.Pool] = {}
+        self._pool_locks: Dict[str, asyncio.Lock] = {}
+        self._last_ok: Dict[str, float] = {}  # node name -> time.monotonic() of last successful query
+        self._cluster_state_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+        self._cluster_state_ttl = self.config.thresholds.cluster_state_cache_seconds
+        self._monitor_reachable = True  # whether the last cluster state fetch reached the monitor
+        self._http = self._create_http_session()
+        self.null_alerts_sent = 0  # alerts swallowed by the 'null' transport
+        self.alert_rules = tuple(
+            replace(rule, threshold=self.config.thresholds.max_replication_lag_bytes)
+            if rule.name == "high_replication_lag" else rule
+            for rule in ALERT_RULES
+        )
 
-    def _load_config(self, config_path: str) -> Dict[str, Any]:
-        """Load configuration from YAML file"""
+    def _load_config(self, config_path: str) -> MonitorConfig:
+        """Load configuration from YAML file, falling back to defaults for missing settings"""
         try:
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-
-            # Set defaults
-            config.setdefault('database', {})
-            config['database'].setdefault('monitor_host', 'localhost')
-            config['database']['monitor_host'] = os.getenv('PGAF_MONITOR_HOST', config['database']['monitor_host'])
-            config['database'].setdefault('monitor_port', 5431)
-            config['database'].setdefault('monitor_database', 'pg_auto_failover')
-            config['database'].setdefault('monitor_user', 'autoctl_node')
-            config['database'].setdefault('monitor_password', 'autoctl_node')
-
-            config.setdefault('nodes', {})
-            config['nodes'].setdefault('primary', {'host': 'localhost', 'port': 5432})
-            config['nodes'].setdefault('replica1', {'host': 'localhost', 'port': 5433})
-            config['nodes'].setdefault('replica2', {'host': 'localhost', 'port': 5434})
-
-            config.setdefault('thresholds', {})
-            config['thresholds'].setdefault('max_replication_lag_bytes', 1000000)  # 1MB
-            config['thresholds'].setdefault('max_replication_lag_seconds', 30)
-            config['thresholds'].setdefault('connection_timeout_seconds', 5)
-            config['thresholds'].setdefault('health_check_interval_seconds', 30)
-
-            config.setdefault('alerting', {})
-            config['alerting'].setdefault('email', {})
-            config['alerting']['email'].setdefault('smtp_server', 'localhost')
-            config['alerting']['email'].setdefault('smtp_port', 587)
-            config['alerting']['email'].setdefault('from_email', 'monitor@example.com')
-            config['alerting']['email'].setdefault('to_emails', [])
-            config['alerting'].setdefault('webhook_urls', [])
-
-            return config
-
+                config = yaml.safe_load(f) or {}
         except FileNotFoundError:
             self.logger.error(f"Configuration file not found: {config_path}")
-            return {}
+            config = {}
         except yaml.YAMLError as e:
             self.logger.error(f"Error parsing configuration file: {e}")
-            return {}
+            config = {}
+
+        database = config.get('database') or {}
+        alerting = config.get('alerting') or {}
+        email = alerting.get('email') or {}
+
+        # A nodes section replaces the default nodes rather than extending them
+        if 'nodes' in config:
+            nodes = {
+                name: _config_section(NodeConfig, node)
+                for name, node in (config['nodes'] or {}).items()
+            }
+        else:
+            nodes = dict(MonitorConfig().nodes)
+
+        return MonitorConfig(
+            database=_config_section(
+                DatabaseConfig, database,
+                monitor_host=os.getenv('PGAF_MONITOR_HOST', database.get('monitor_host', 'localhost'))
+            ),
+            nodes=MappingProxyType(nodes),
+            thresholds=_config_section(ThresholdsConfig, config.get('thresholds')),
+            alerting=AlertingConfig(
+                email=_config_section(EmailConfig, email, to_emails=tuple(email.get('to_emails') or ())),
+                webhook_urls=tuple(alerting.get('webhook_urls') or ())
+            )
+        )
 
     def _setup_logging(self) -> logging.Logger:
         """Setup logging configuration"""
         logger = logging.getLogger('pg_ha_monitor')
         logger.setLevel(logging.INFO)
 
+        # Several monitors can share a process; attach the handlers only once
+        if logger.handlers:
+            return logger
+
         # Create handlers
         console_handler = logging.StreamHandler(sys.stdout)
         file_handler = logging.FileHandler('monitoring/pg_ha_monitor.log')
@@ -163,171 +457,198 @@ class PGHAMonitor:
 
         return logger
 
-    def _get_monitor_connection(self) -> Optional[psycopg2.connection]:
-        """Get connection to pg_auto_failover monitor"""
+    def _create_http_session(self) -> requests.Session:
+        """Create a keep-alive HTTP session reused for webhook delivery"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    async def _get_pool(self, key: str, **connect_kwargs) -> asyncpg.Pool:
+        """Get or lazily create the persistent connection pool cached under key"""
+        if key in self._pools:
+            return self._pools[key]
+
+        # Health and replication probes for the same node run concurrently,
+        # so serialize pool creation to avoid opening two pools per node
+        lock = self._pool_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key not in self._pools:
+                # asyncpg prepares every statement once per connection; the
+                # monitor only runs a few fixed queries, so keep them prepared
+                # for the connection's lifetime instead of re-planning them
+                # every few minutes
+                # command_timeout bounds every query too: a silently dead
+                # host would otherwise hang a fetch on the open socket until
+                # the kernel gives up on TCP retransmits
+                self._pools[key] = await asyncpg.create_pool(
+                    timeout=self.config.thresholds.connection_timeout_seconds,
+                    command_timeout=self.config.thresholds.connection_timeout_seconds,
+                    max_cached_statement_lifetime=0,
+                    **connect_kwargs
+                )
+            return self._pools[key]
+
+    @staticmethod
+    async def ping(conn: Any):
+        """Check that a connection or pool is alive, raising if it is not"""
+        await conn.execute(_LIVENESS_SQL)
+
+    async def _discard_broken_connections(self, pool: asyncpg.Pool, error: Exception):
+        """Have the pool reconnect if the error means its connections are dead"""
+        if isinstance(error, _CONNECTION_ERRORS):
+            await pool.expire_connections()
+
+    async def _get_monitor_connection(self) -> Optional[asyncpg.Pool]:
+        """Get the connection pool for the pg_auto_failover monitor"""
         try:
-            conn = psycopg2.connect(
-                host=self.config['database']['monitor_host'],
-                port=self.config['database']['monitor_port'],
-                database=self.config['database']['monitor_database'],
-                user=self.config['database']['monitor_user'],
-                password=self.config['database']['monitor_password'],
-                connect_timeout=self.config['thresholds']['connection_timeout_seconds']
+            return await self._get_pool(
+                _MONITOR_POOL,
+                host=self.config.database.monitor_host,
+                port=self.config.database.monitor_port,
+                database=self.config.database.monitor_database,
+                user=self.config.database.monitor_user,
+                password=self.config.database.monitor_password,
+                min_size=1,
+                max_size=2  # one connection stays checked out for LISTEN
             )
-            return conn
         except Exception as e:
             self.logger.error(f"Failed to connect to monitor: {e}")
             return None
 
-    def _get_node_connection(self, node_name: str) -> Optional[psycopg2.connection]:
-        """Get connection to a specific PostgreSQL node"""
-        if node_name in self.node_connections:
-            return self.node_connections[node_name]
+    def _node_connect_kwargs(self, node_name: str) -> Dict[str, Any]:
+        """Get the asyncpg connection arguments for a specific PostgreSQL node"""
+        node_config = self.config.nodes.get(node_name) or NodeConfig()
+        return {
+            'host': node_config.host,
+            'port': node_config.port,
+            'database': 'postgres',
+            'user': self.config.database.postgres_user,
+            'password': self.config.database.postgres_password,
+        }
 
+    async def _get_node_connection(self, node_name: str, verify: bool = True) -> Optional[asyncpg.Pool]:
+        """Get the connection pool for a specific PostgreSQL node, checking liveness if stale"""
+        pool = None
         try:
-            node_config = self.config['nodes'].get(node_name, {})
-            conn = psycopg2.connect(
-                host=node_config.get('host', 'localhost'),
-                port=node_config.get('port', 5432),
-                database='postgres',
-                user='postgres',
-                password=self.config['database'].get('postgres_password', 'postgres_password'),
-                connect_timeout=self.config['thresholds']['connection_timeout_seconds']
+            pool = await self._get_pool(
+                node_name,
+                min_size=1,
+                max_size=4,
+                **self._node_connect_kwargs(node_name)
             )
-            self.node_connections[node_name] = conn
-            return conn
+
+            # Only probe when the node has not answered recently
+            last_ok = self._last_ok.get(node_name)
+            if verify and (last_ok is None or
+                           time.monotonic() - last_ok > self.config.thresholds.connection_probe_idle_seconds):
+                await self.ping(pool)
+                self._last_ok[node_name] = time.monotonic()
+
+            return pool
         except Exception as e:
             self.logger.error(f"Failed to connect to node {node_name}: {e}")
+            if pool:
+                await self._discard_broken_connections(pool, e)
             return None
 
-    def get_cluster_state(self) -> Optional[Dict[str, Any]]:
+    async def pool(self, node_name: str) -> Optional[asyncpg.Pool]:
+        """Get the shared connection pool for a node, or None if the node is unreachable
+
+        The pool is probed first unless the node answered a query within
+        connection_probe_idle_seconds.
+        """
+        return await self._get_node_connection(node_name)
+
+    async def close(self):
+        """Close all monitor and node connection pools and the HTTP session"""
+        self._http.close()
+        pools = list(self._pools.values())
+        self._pools.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
+
+    async def get_cluster_state(self) -> Optional[Dict[str, Any]]:
         """Get cluster state from pg_auto_failover monitor"""
-        conn = self._get_monitor_connection()
-        if not conn:
+        # Serve back-to-back calls from memory; failed fetches are never cached
+        cached_at, cached_state = self._cluster_state_cache
+        if cached_state is not None and time.monotonic() - cached_at < self._cluster_state_ttl:
+            return cached_state
+
+        pool = await self._get_monitor_connection()
+        if not pool:
+            self._monitor_reachable = False
             return None
 
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT nodeid, nodename, nodehost, nodeport,
-                           reportedstate, health, reportedlsn,
-                           goalstate, statechangetime
-                    FROM pgautofailover.node
-                    ORDER BY nodeid
-                """)
-                nodes = cursor.fetchall()
-
-                cursor.execute("""
-                    SELECT name, kind, number_sync_standbys
-                    FROM pgautofailover.formation
-                """)
-                formation = cursor.fetchone()
-
-                return {
-                    'nodes': nodes,
-                    'formation': formation,
-                    'timestamp': datetime.now()
-                }
+            # Fetch nodes and formation as one JSON document so the monitor
+            # answers in a single round trip
+            state = orjson.loads(await pool.fetchval(_CLUSTER_STATE_SQL))
+
+            nodes = state['nodes']
+            for node in nodes:
+                if node['statechangetime'] is not None:
+                    node['statechangetime'] = datetime.fromtimestamp(float(node['statechangetime']), _UTC)
+
+            cluster_state = {
+                'nodes': nodes,
+                'formation': state['formation'],
+                'timestamp': datetime.now(_UTC)
+            }
+            self._cluster_state_cache = (time.monotonic(), cluster_state)
+            self._monitor_reachable = True
+            return cluster_state
         except Exception as e:
             self.logger.error(f"Failed to get cluster state: {e}")
+            self._monitor_reachable = False
+            await self._discard_broken_connections(pool, e)
             return None
-        finally:
-            conn.close()
 
-    def check_node_health(self, node_info: Dict[str, Any]) -> Tuple[HealthStatus, str]:
-        """Check health of a specific node"""
+    async def check_node_health(self, node_info: Dict[str, Any],
+                                now: Optional[datetime] = None) -> Tuple[HealthStatus, str, Optional[Dict[str, Any]]]:
+        """Check health of a specific node and collect its replication status"""
+        now = now or datetime.now(_UTC)
         node_name = node_info['nodename']
-        conn = self._get_node_connection(node_name)
+        # The probe query below doubles as the liveness check
+        pool = await self._get_node_connection(node_name, verify=False)
 
-        if not conn:
-            return HealthStatus.UNHEALTHY, "Cannot connect to node"
+        if not pool:
+            return HealthStatus.UNHEALTHY, "Cannot connect to node", None
 
         try:
-            with conn.cursor() as cursor:
-                # Check if PostgreSQL is responding
-                cursor.execute("SELECT 1")
-                result = cursor.fetchone()
-
-                if not result:
-                    return HealthStatus.UNHEALTHY, "No response from PostgreSQL"
-
-                # Get PostgreSQL version
-                cursor.execute("SELECT version()")
-                version = cursor.fetchone()[0]
-
-                # Check if node is in recovery (replica)
-                cursor.execute("SELECT pg_is_in_recovery()")
-                in_recovery = cursor.fetchone()[0]
-
-                # Get replication lag if this is a replica
-                lag_bytes = None
-                if in_recovery:
-                    cursor.execute("""
-                        SELECT COALESCE(
-                            pg_last_wal_receive_time(),
-                            pg_last_wal_replay_time()
-                        ) as last_activity
-                    """)
-                    last_activity = cursor.fetchone()[0]
-
-                    if last_activity:
-                        lag_seconds = (datetime.now() - last_activity.replace(tzinfo=None)).total_seconds()
-                        lag_bytes = int(lag_seconds * 1024 * 1024)  # Rough estimate
-                    else:
-                        lag_bytes = 999999999  # Very high lag
+            # Version, recovery state, replay backlog and replication stats
+            # in a single round trip
+            row = await pool.fetchrow(_NODE_PROBE_SQL)
 
-                return HealthStatus.HEALTHY, f"PostgreSQL {version.split()[1]}"
+            if not row:
+                return HealthStatus.UNHEALTHY, "No response from PostgreSQL", None
 
-        except Exception as e:
-            return HealthStatus.UNHEALTHY, f"Health check failed: {e}"
-        finally:
-            conn.close()
-            if node_name in self.node_connections:
-                del self.node_connections[node_name]
-
-    def get_replication_status(self, node_name: str) -> Optional[Dict[str, Any]]:
-        """Get detailed replication status for a node"""
-        conn = self._get_node_connection(node_name)
-        if not conn:
-            return None
+            self._last_ok[node_name] = time.monotonic()
+
+            replication_status = {
+                'node': node_name,
+                'replication_slots': orjson.loads(row['replication_stats'] or '[]'),
+                # WAL received but not yet replayed; only set on standbys
+                'replay_backlog_bytes': row['replay_backlog_bytes'],
+                'timestamp': now
+            }
+
+            return HealthStatus.HEALTHY, f"PostgreSQL {row['version'].split()[1]}", replication_status
 
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT
-                        client_addr,
-                        client_hostname,
-                        state,
-                        sync_state,
-                        pg_current_wal_lsn() - replay_lsn as replay_lag_bytes,
-                        pg_current_wal_lsn() - received_lsn as receive_lag_bytes,
-                        extract(epoch from now() - pg_last_wal_receive_time()) as receive_lag_seconds,
-                        extract(epoch from now() - pg_last_wal_replay_time()) as replay_lag_seconds,
-                        backend_start
-                    FROM pg_stat_replication
-                """)
-                replication_stats = cursor.fetchall()
-
-                return {
-                    'node': node_name,
-                    'replication_slots': replication_stats,
-                    'timestamp': datetime.now()
-                }
         except Exception as e:
-            self.logger.error(f"Failed to get replication status for {node_name}: {e}")
-            return None
-        finally:
-            conn.close()
-            if node_name in self.node_connections:
-                del self.node_connections[node_name]
+            await self._discard_broken_connections(pool, e)
+            return HealthStatus.UNHEALTHY, f"Health check failed: {e}", None
 
-    def perform_health_check(self) -> ClusterHealth:
+    async def perform_health_check(self) -> ClusterHealth:
         """Perform comprehensive health check of the cluster"""
-        cluster_state = self.get_cluster_state()
+        cluster_state = await self.get_cluster_state()
         if not cluster_state:
             return ClusterHealth(
-                timestamp=datetime.now(),
-                nodes=[],
+                timestamp=datetime.now(_UTC),
                 primary_count=0,
                 replica_count=0,
                 unhealthy_nodes=1,
@@ -336,59 +657,83 @@ class PGHAMonitor:
                 issues=["Cannot connect to pg_auto_failover monitor"]
             )
 
-        nodes = []
-        primary_count = 0
-        replica_count = 0
-        unhealthy_nodes = 0
-        max_lag = 0
-        issues = []
+        cluster_health = ClusterHealth(
+            timestamp=cluster_state['timestamp'],
+            primary_count=0,
+            replica_count=0,
+            unhealthy_nodes=0,
+            max_replication_lag=None,
+            failover_ready=False,
+            issues=[]
+        )
+        issues = cluster_health.issues
 
-        for node_data in cluster_state['nodes']:
-            # Map state codes to enum
-            state_code = node_data['reportedstate']
-            try:
-                state = NodeState(state_code)
-            except ValueError:
-                state = NodeState.UNKNOWN
+        # Map reported state labels to enum
+        states = [
+            _STATE_BY_LABEL.get(node_data['reportedstate'], NodeState.UNKNOWN)
+            for node_data in cluster_state['nodes']
+        ]
 
-            # Check node health
-            health, health_message = self.check_node_health(node_data)
+        # Probe every node concurrently
+        now = datetime.now(_UTC)
+        probes = await asyncio.gather(
+            *(self.check_node_health(node_data, now) for node_data in cluster_state['nodes']),
+            return_exceptions=True
+        )
 
-            # Count roles
-            if state == NodeState.PRIMARY:
-                primary_count += 1
-            elif state in [NodeState.SECONDARY, NodeState.WAIT_STANDBY]:
-                replica_count += 1
+        # Lag of every standby as reported by the primary's walsenders,
+        # keyed by application name and client address
+        standby_lags = {}
+        for state, probe in zip(states, probes):
+            if state != NodeState.PRIMARY or isinstance(probe, BaseException) or not probe[2]:
+                continue
+            for slot in probe[2]['replication_slots']:
+                for key in (slot.get('application_name'), slot.get('client_hostname'), slot.get('client_addr')):
+                    if key:
+                        standby_lags[key] = slot.get('replay_lag_bytes')
+
+        for node_data, state, probe in zip(cluster_state['nodes'], states, probes):
+            if isinstance(probe, BaseException):
+                health, health_message = HealthStatus.UNHEALTHY, f"Health check failed: {probe}"
+                rep_status = None
+            else:
+                health, health_message, rep_status = probe
 
             # Track unhealthy nodes
             if health == HealthStatus.UNHEALTHY:
-                unhealthy_nodes += 1
                 issues.append(f"Node {node_data['nodename']}: {health_message}")
 
-            # Get replication lag for replicas
+            # Get replication lag for replicas; pg_auto_failover names each
+            # standby's walsender pgautofailover_standby_<nodeid>
             replication_lag = None
             if state in [NodeState.SECONDARY, NodeState.WAIT_STANDBY]:
-                rep_status = self.get_replication_status(node_data['nodename'])
-                if rep_status and rep_status['replication_slots']:
-                    for slot in rep_status['replication_slots']:
-                        lag = slot.get('replay_lag_bytes', 0)
-                        if lag and lag > max_lag:
-                            max_lag = lag
-                        if lag:
-                            replication_lag = lag
-
-            node_info = NodeInfo(
-                name=node_data['nodename'],
-                hostname=node_data['nodehost'],
-                port=node_data['nodeport'],
-                role=state.name.lower(),
-                state=state,
-                health=health,
-                replication_lag=replication_lag,
-                last_seen=node_data['statechangetime']
-            )
-
-            nodes.append(node_info)
+                for key in (f"pgautofailover_standby_{node_data['nodeid']}", node_data['nodehost']):
+                    lag = standby_lags.get(key)
+                    if lag:
+                        replication_lag = lag
+                        break
+
+                # Fall back to the standby's own replay backlog when the
+                # primary did not report it
+                if replication_lag is None and rep_status:
+                    replication_lag = rep_status['replay_backlog_bytes'] or None
+
+            last_seen = node_data['statechangetime']
+            cluster_health.names.append(node_data['nodename'])
+            cluster_health.hostnames.append(node_data['nodehost'])
+            cluster_health.ports.append(node_data['nodeport'])
+            cluster_health.roles.append(state.name.lower())
+            cluster_health.states.append(state.value)
+            cluster_health.healths.append(health.value)
+            cluster_health.lags.append(int(replication_lag) if replication_lag is not None else -1)
+            cluster_health.last_seens.append(last_seen.timestamp() if last_seen else None)
+
+        # Count roles, unhealthy nodes and the worst lag over the columns
+        primary_count, replica_count, unhealthy_nodes, max_lag = (
+            int(value) for value in _aggregate(*_as_int64_columns(
+                cluster_health.states, cluster_health.healths, cluster_health.lags
+            ))
+        )
 
         # Determine if failover is ready
         failover_ready = (
@@ -404,81 +749,31 @@ class PGHAMonitor:
             issues.append("Multiple primary nodes detected")
             failover_ready = False
 
-        return ClusterHealth(
-            timestamp=cluster_state['timestamp'],
-            nodes=nodes,
-            primary_count=primary_count,
-            replica_count=replica_count,
-            unhealthy_nodes=unhealthy_nodes,
-            max_replication_lag=max_lag if max_lag > 0 else None,
-            failover_ready=failover_ready,
-            issues=issues
-        )
+        cluster_health.primary_count = primary_count
+        cluster_health.replica_count = replica_count
+        cluster_health.unhealthy_nodes = unhealthy_nodes
+        cluster_health.max_replication_lag = max_lag if max_lag > 0 else None
+        cluster_health.failover_ready = failover_ready
+        return cluster_health
 
-    def check_alerts(self, health: ClusterHealth) -> List[Dict[str, Any]]:
+    def check_alerts(self, health: ClusterHealth, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Check if any alert conditions are met"""
         alerts = []
-        current_time = datetime.now()
-
-        # Define alert rules
-        alert_rules = [
-            AlertRule(
-                name="no_primary",
-                condition="primary_count == 0",
-                threshold=0,
-                severity="critical"
-            ),
-            AlertRule(
-                name="multiple_primaries",
-                condition="primary_count > 1",
-                threshold=1,
-                severity="critical"
-            ),
-            AlertRule(
-                name="unhealthy_nodes",
-                condition="unhealthy_nodes > 0",
-                threshold=0,
-                severity="warning"
-            ),
-            AlertRule(
-                name="high_replication_lag",
-                condition="max_replication_lag is not None",
-                threshold=self.config['thresholds']['max_replication_lag_bytes'],
-                severity="warning"
-            ),
-            AlertRule(
-                name="failover_not_ready",
-                condition="not failover_ready",
-                threshold=0,
-                severity="info"
-            )
-        ]
+        current_time = now or datetime.now(_UTC)
+        mono_now = time.monotonic()
 
-        for rule in alert_rules:
+        for rule in self.alert_rules:
             if not rule.enabled:
                 continue
 
             # Check cooldown period
             last_alert = self.alert_history.get(rule.name)
-            if last_alert and (current_time - last_alert).total_seconds() < (rule.cooldown_minutes * 60):
+            if last_alert is not None and mono_now - last_alert < rule.cooldown_minutes * 60:
                 continue
 
             # Evaluate condition
-            should_alert = False
             try:
-                if rule.name == "no_primary":
-                    should_alert = health.primary_count == 0
-                elif rule.name == "multiple_primaries":
-                    should_alert = health.primary_count > 1
-                elif rule.name == "unhealthy_nodes":
-                    should_alert = health.unhealthy_nodes > 0
-                elif rule.name == "high_replication_lag":
-                    should_alert = (
-                        health.max_replication_lag is not None and
-                        health.max_replication_lag > rule.threshold
-                    )
-                elif rule.name == "failover_not_ready":
-                    should_alert = not health.failover_ready
+                should_alert = _ALERT_PREDICATES[rule.name](health, rule.threshold)
             except Exception as e:
                 self.logger.error(f"Error evaluating alert rule {rule.name}: {e}")
                 continue
@@ -488,11 +783,10 @@ class PGHAMonitor:
                     'rule': rule.name,
                     'severity': rule.severity,
                     'message': self._generate_alert_message(rule, health),
-                    'timestamp': current_time,
-                    'health_data': asdict(health)
+                    'timestamp': current_time
                 }
                 alerts.append(alert)
-                self.alert_history[rule.name] = current_time
+                self.alert_history[rule.name] = mono_now
 
         return alerts
 
@@ -511,93 +805,125 @@ class PGHAMonitor:
             return "INFO: Cluster not ready for failover"
         return f"Alert triggered: {rule.name}"
 
-    def send_alert(self, alert: Dict[str, Any]) -> bool:
-        """Send alert via configured channels"""
-        success = False
+    async def send_alerts(self, alerts: List[Dict[str, Any]], health: ClusterHealth,
+                          transport: str = 'configured') -> bool:
+        """Send all alerts from one health check as a single batch via configured channels
+
+        With transport='null' nothing is delivered; the alerts are only counted
+        in null_alerts_sent, which lets tests exercise the send path offline.
+        """
+        if not alerts:
+            return False
+
+        if transport == 'null':
+            self.null_alerts_sent += len(alerts)
+            return True
+
+        # One cluster snapshot shared by every channel and alert in the batch
+        health_data = asdict(health)
+        deliveries = []
 
         # Send email alerts
-        if self.config['alerting']['email']['to_emails']:
-            success = self._send_email_alert(alert) or success
+        if self.config.alerting.email.to_emails:
+            deliveries.append(self._send_email_alert(alerts, health_data))
 
         # Send webhook alerts
-        if self.config['alerting']['webhook_urls']:
-            success = self._send_webhook_alert(alert) or success
+        if self.config.alerting.webhook_urls:
+            payload = orjson.dumps(
+                {'cluster': health_data, 'alerts': alerts},
+                default=_json_default
+            )
+            deliveries.append(asyncio.to_thread(self._send_webhook_alert, payload))
 
-        return success
+        results = await asyncio.gather(*deliveries)
+        return any(results)
 
-    def _send_email_alert(self, alert: Dict[str, Any]) -> bool:
-        """Send alert via email"""
+    async def _send_email_alert(self, alerts: List[Dict[str, Any]], health_data: Dict[str, Any]) -> bool:
+        """Send a batch of alerts via a single email"""
         try:
-            config = self.config['alerting']['email']
+            config = self.config.alerting.email
+            severity = max((alert['severity'] for alert in alerts), key=lambda s: _SEVERITY_RANK.get(s, 1))
 
             msg = MIMEMultipart()
-            msg['From'] = config['from_email']
-            msg['To'] = ', '.join(config['to_emails'])
-            msg['Subject'] = f"PostgreSQL HA Alert: {alert['severity'].upper()}"
+            msg['From'] = config.from_email
+            msg['To'] = ', '.join(config.to_emails)
+            msg['Subject'] = f"PostgreSQL HA Alert: {severity.upper()}"
 
             body = f"""
 PostgreSQL HA Cluster Alert
 
-Severity: {alert['severity'].upper()}
-Time: {alert['timestamp']}
-Rule: {alert['rule']}
+Severity: {severity.upper()}
+Time: {alerts[0]['timestamp']}
 
-Message: {alert['message']}
+Alerts:
+{chr(10).join(f"- [{alert['severity'].upper()}] {alert['rule']}: {alert['message']}" for alert in alerts)}
 
 Cluster Status:
-- Primary nodes: {alert['health_data']['primary_count']}
-- Replica nodes: {alert['health_data']['replica_count']}
-- Unhealthy nodes: {alert['health_data']['unhealthy_nodes']}
-- Failover ready: {alert['health_data']['failover_ready']}
+- Primary nodes: {health_data['primary_count']}
+- Replica nodes: {health_data['replica_count']}
+- Unhealthy nodes: {health_data['unhealthy_nodes']}
+- Failover ready: {health_data['failover_ready']}
 
 Issues detected:
-{chr(10).join('- ' + issue for issue in alert['health_data']['issues'])}
+{chr(10).join('- ' + issue for issue in health_data['issues'])}
             """
 
             msg.attach(MIMEText(body, 'plain'))
 
-            server = smtplib.SMTP(config['smtp_server'], config['smtp_port'])
-            server.starttls()
-            server.send_message(msg)
-            server.quit()
+            await aiosmtplib.send(
+                msg,
+                hostname=config.smtp_server,
+                port=config.smtp_port,
+                username=config.smtp_username or None,
+                password=config.smtp_password or None,
+                start_tls=True
+            )
 
-            self.logger.info(f"Email alert sent: {alert['message']}")
+            self.logger.info(f"Email alert sent: {len(alerts)} alert(s), severity {severity}")
             return True
 
         except Exception as e:
             self.logger.error(f"Failed to send email alert: {e}")
             return False
 
-    def _send_webhook_alert(self, alert: Dict[str, Any]) -> bool:
-        """Send alert via webhook"""
-        success = False
-        for webhook_url in self.config['alerting']['webhook_urls']:
-            try:
-                response = requests.post(
-                    webhook_url,
-                    json=alert,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=10
-                )
+    def _send_webhook_alert(self, payload: bytes) -> bool:
+        """Send a JSON-encoded alert to all webhooks concurrently"""
+        webhook_urls = self.config.alerting.webhook_urls
+        with ThreadPoolExecutor(max_workers=len(webhook_urls)) as executor:
+            results = list(executor.map(
+                lambda webhook_url: self._post_webhook(webhook_url, payload),
+                webhook_urls
+            ))
+        return any(results)
+
+    def _post_webhook(self, webhook_url: str, payload: bytes) -> bool:
+        """Post a JSON-encoded alert to a single webhook"""
+        try:
+            response = self._http.post(
+                webhook_url,
+                data=payload,
+                headers={'Content-Type': 'application/json'},
+                timeout=10
+            )
 
-                if response.status_code in [200, 201, 202]:
-                    self.logger.info(f"Webhook alert sent to {webhook_url}")
-                    success = True
-                else:
-                    self.logger.error(f"Webhook alert failed: {response.status_code} - {response.text}")
+            if response.status_code in [200, 201, 202]:
+                self.logger.info(f"Webhook alert sent to {webhook_url}")
+                return True
 
-            except Exception as e:
-                self.logger.error(f"Failed to send webhook alert to {webhook_url}: {e}")
+            self.logger.error(f"Webhook alert failed: {response.status_code} - {response.text}")
 
-        return success
+        except Exception as e:
+            self.logger.error(f"Failed to send webhook alert to {webhook_url}: {e}")
+
+        return False
 
     def generate_report(self, health: ClusterHealth) -> str:
         """Generate detailed cluster health report"""
-        report = f"""
+        header = f"""
 PostgreSQL HA Cluster Health Report
 ==================================
 Generated: {health.timestamp}
-Duration: {datetime.now() - health.timestamp}
+Duration: {datetime.now(_UTC) - health.timestamp}
 
 Cluster Overview:
 - Primary nodes: {health.primary_count}
@@ -608,67 +934,137 @@ Cluster Overview:
 Node Details:
 """
 
-        for node in health.nodes:
+        parts = [header]
+        for node in health.iter_nodes():
             status_icon = "✅" if node.health == HealthStatus.HEALTHY else "❌"
             lag_info = f", Lag: {node.replication_lag / (1024*1024):.2f}MB" if node.replication_lag else ""
-            report += f"{status_icon} {node.name} ({node.hostname}:{node.port}) - {node.role}{lag_info}\n"
+            parts.append(f"{status_icon} {node.name} ({node.hostname}:{node.port}) - {node.role}{lag_info}\n")
 
         if health.issues:
-            report += "\nIssues Detected:\n"
-            for issue in health.issues:
-                report += f"- {issue}\n"
-
-        return report
-
-    async def monitor_loop(self):
-        """Main monitoring loop"""
-        self.logger.info("Starting PostgreSQL HA monitoring...")
+            parts.append("\nIssues Detected:\n")
+            parts.extend(f"- {issue}\n" for issue in health.issues)
+
+        return ''.join(parts)
+
+    def _write_report(self, report: str, path: str = 'monitoring/cluster_report.txt'):
+        """Atomically replace the report file so readers never see a partial report"""
+        # Per-process temporary name so overlapping runs never share one
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(report)
+        os.replace(tmp_path, path)
+
+    async def _listen_for_state_changes(self, state_changed: asyncio.Event) -> Optional[asyncpg.Connection]:
+        """Subscribe to pg_auto_failover state change notifications on a dedicated monitor connection"""
+        pool = await self._get_monitor_connection()
+        if not pool:
+            return None
 
-        while True:
-            try:
-                # Perform health check
-                health = self.perform_health_check()
+        def on_state_change(connection, pid, channel, payload):
+            # The cached cluster state is stale as soon as a node changes state
+            self._cluster_state_cache = (0.0, None)
+            state_changed.set()
 
-                # Check for alerts
-                alerts = self.check_alerts(health)
+        def on_terminated(connection):
+            # Wake the loop so it falls back to polling and resubscribes
+            state_changed.set()
 
-                # Send alerts
-                for alert in alerts:
-                    self.send_alert(alert)
+        conn = None
+        try:
+            conn = await pool.acquire()
+            await conn.add_listener(_STATE_CHANNEL, on_state_change)
+            conn.add_termination_listener(on_terminated)
+            return conn
+        except Exception as e:
+            self.logger.error(f"Failed to listen for state changes: {e}")
+            if conn is not None:
+                await pool.release(conn)
+            return None
 
-                # Log status
-                if alerts:
-                    self.logger.warning(f"Alerts triggered: {len(alerts)}")
-                    for alert in alerts:
-                        self.logger.warning(f"  - {alert['message']}")
-                else:
-                    self.logger.info(f"Cluster healthy - Primary: {health.primary_count}, Replicas: {health.replica_count}")
+    async def _stop_listening(self, listener: asyncpg.Connection):
+        """Return the notification connection to the monitor pool"""
+        pool = self._pools.get(_MONITOR_POOL)
+        if pool:
+            await pool.release(listener)
 
-                # Generate and save report
-                report = self.generate_report(health)
-                with open('monitoring/cluster_report.txt', 'w') as f:
-                    f.write(report)
+    async def monitor_loop(self):
+        """Main monitoring loop"""
+        self.logger.info("Starting PostgreSQL HA monitoring...")
 
-                # Wait for next check
-                await asyncio.sleep(self.config['thresholds']['health_check_interval_seconds'])
+        poll_interval = self.config.thresholds.health_check_interval_seconds
+        heartbeat_interval = self.config.thresholds.heartbeat_interval_seconds
+        state_changed = asyncio.Event()
+        listener = None
+        next_check = time.monotonic()
 
-            except Exception as e:
-                self.logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(60)  # Wait longer on errors
+        try:
+            while True:
+                try:
+                    # (Re)subscribe if the notification connection is missing or dead;
+                    # while the monitor is unreachable the health check alone
+                    # retries the connection, so each tick waits out one timeout
+                    if listener is not None and listener.is_closed():
+                        await self._stop_listening(listener)
+                        listener = None
+                    if listener is None and self._monitor_reachable:
+                        listener = await self._listen_for_state_changes(state_changed)
+
+                    # Changes arriving during this check trigger the next one
+                    state_changed.clear()
+
+                    # Perform health check
+                    health = await self.perform_health_check()
+
+                    # Check for alerts
+                    alerts = self.check_alerts(health, health.timestamp)
+
+                    # Send alerts
+                    await self.send_alerts(alerts, health)
+
+                    # Log status
+                    if alerts:
+                        self.logger.warning(f"Alerts triggered: {len(alerts)}")
+                        for alert in alerts:
+                            self.logger.warning(f"  - {alert['message']}")
+                    else:
+                        self.logger.info(f"Cluster healthy - Primary: {health.primary_count}, Replicas: {health.replica_count}")
+
+                    # Generate and save report
+                    self._write_report(self.generate_report(health))
+
+                    # Wait for a state change notification, or the heartbeat;
+                    # without notifications fall back to regular polling. The
+                    # cadence is fixed regardless of how long this check took
+                    # (without bursting after an overrun)
+                    interval = heartbeat_interval if listener is not None else poll_interval
+                    next_check = max(next_check + interval, time.monotonic())
+                    try:
+                        await asyncio.wait_for(state_changed.wait(), timeout=next_check - time.monotonic())
+                        next_check = time.monotonic()
+                    except asyncio.TimeoutError:
+                        pass
+
+                except Exception as e:
+                    self.logger.error(f"Error in monitoring loop: {e}")
+                    await asyncio.sleep(60)  # Wait longer on errors
+                    next_check = time.monotonic()
+        finally:
+            if listener is not None:
+                await self._stop_listening(listener)
 
-    def test_failover(self) -> Dict[str, Any]:
-        """Test failover mechanism"""
+    async def test_failover(self, health: Optional[ClusterHealth] = None) -> Dict[str, Any]:
+        """Test failover mechanism, optionally reusing an already computed health check"""
         self.logger.info("Testing failover mechanism...")
 
         # Get current state
-        initial_state = self.get_cluster_state()
+        initial_state = await self.get_cluster_state()
         if not initial_state:
             return {'success': False, 'error': 'Cannot get cluster state'}
 
         # Find current primary
         primary_node = None
         for node in initial_state['nodes']:
-            if node['reportedstate'] == 3:  # PRIMARY
+            if _STATE_BY_LABEL.get(node['reportedstate']) == NodeState.PRIMARY:
                 primary_node = node
                 break
 
@@ -679,7 +1075,8 @@ Node Details:
 
         # Simulate failover by stopping primary (in real scenario, this would be done differently)
         # For testing, we'll just check if failover would be possible
-        health = self.perform_health_check()
+        if health is None:
+            health = await self.perform_health_check()
 
         test_result = {
             'success': health.failover_ready,
@@ -687,7 +1084,7 @@ Node Details:
             'replica_count': health.replica_count,
             'unhealthy_nodes': health.unhealthy_nodes,
             'issues': health.issues,
-            'timestamp': datetime.now()
+            'timestamp': datetime.now(_UTC)
         }
 
         if health.failover_ready:
@@ -698,39 +1095,46 @@ Node Details:
         return test_result
 
 
-def main():
-    """Main entry point"""
-    monitor = PGHAMonitor()
-
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-
+async def run_command(monitor: PGHAMonitor, command: str):
+    """Run a CLI command against the cluster and release connections afterwards"""
+    try:
         if command == "health":
-            health = monitor.perform_health_check()
+            health = await monitor.perform_health_check()
             print(monitor.generate_report(health))
 
         elif command == "test-failover":
-            result = monitor.test_failover()
-            print(json.dumps(result, indent=2, default=str))
+            result = await monitor.test_failover()
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2, default=_json_default).decode())
 
         elif command == "cluster-state":
-            state = monitor.get_cluster_state()
+            state = await monitor.get_cluster_state()
             if state:
-                print(json.dumps(state, indent=2, default=str))
+                print(orjson.dumps(state, option=orjson.OPT_INDENT_2, default=_json_default).decode())
             else:
                 print("Failed to get cluster state")
 
         elif command == "monitor":
-            asyncio.run(monitor.monitor_loop())
+            await monitor.monitor_loop()
+    finally:
+        await monitor.close()
 
-        else:
+
+def main():
+    """Main entry point"""
+    monitor = PGHAMonitor()
+
+    if len(sys.argv) > 1:
+        command = sys.argv[1]
+
+        if command not in ("health", "test-failover", "cluster-state", "monitor"):
             print("Usage: python pg_ha_monitor.py [health|test-failover|cluster-state|monitor]")
             sys.exit(1)
     else:
         # Default to health check
-        health = monitor.perform_health_check()
-        print(monitor.generate_report(health))
+        command = "health"
+
+    asyncio.run(run_command(monitor, command))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
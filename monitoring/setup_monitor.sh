@@ -38,7 +38,7 @@ check_prerequisites() {
 
     # Check Python
     if ! command -v python3 &> /dev/null; then
-        log_error "Python 3 is not installed. Please install Python 3.8 or higher."
+        log_error "Python 3 is not installed. Please install Python 3.10 or higher."
         exit 1
     fi
 
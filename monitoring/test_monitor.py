@@ -6,253 +6,554 @@ This script validates the monitoring system functionality and can be used
 to test the monitor in a safe environment before production deployment.
 """
 
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
 import sys
 import time
-import json
-from pg_ha_monitor import PGHAMonitor
+from contextvars import ContextVar
+from functools import partial
+from typing import List, Optional, Tuple
+import asyncpg
+from pg_ha_monitor import ClusterHealth, PGHAMonitor, run_command
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = "monitoring/config.yaml"
+
+# Failures a test reports as a failed check; anything else is a bug and
+# propagates to main()
+_EXPECTED_ERRORS = (
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+    OSError,
+    asyncio.TimeoutError,
+    KeyError,
+)
+
+# Line templates for per-item listings, each emitted as a single log record
+_ISSUE_LINE = "   - {}".format
+_ALERT_LINE = "   {}: {}".format
+
+# Marker, per-test label and summary label for each test outcome; None is skipped
+_STATUS = {
+    True: ('✅', 'PASSED', '✅ PASS'),
+    False: ('❌', 'FAILED', '❌ FAIL'),
+    None: ('⏭️ ', 'SKIPPED', '⏭️  SKIP'),
+}
+
+
+# Lines logged by the current task while its output is being captured
+_captured: ContextVar[Optional[List[str]]] = ContextVar('_captured', default=None)
+
+
+class _CaptureFilter(logging.Filter):
+    """Divert records into the current task's capture list, if it has one"""
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.formatter = formatter
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        lines = _captured.get()
+        if lines is None:
+            return True
+        lines.append(self.formatter.format(record))
+        return False
+
+
+# Set here rather than in _setup_output() so spawned pool workers, which
+# only import this module, still log test output for capture
+log.setLevel(logging.INFO)
+log.addFilter(_CaptureFilter(logging.Formatter('%(message)s')))
+
+
+async def _run_captured(test_func, monitor: PGHAMonitor):
+    """Run a test with its output captured; return its result or exception and its lines"""
+    lines = []
+    _captured.set(lines)  # gather runs each test in its own task and context
+    try:
+        result = await test_func(monitor)
+    except Exception as e:
+        result = e
+    return result, lines
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Write records to the stdout buffer, leaving the flush to _flush_output()"""
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__(sys.stdout)
+        self.setFormatter(formatter)
+
+    def flush(self):
+        pass
+
+
+def _setup_output():
+    """Send test output to stdout, flushed once per test rather than per line"""
+    log.addHandler(_ConsoleHandler(logging.Formatter('%(message)s')))
+    log.propagate = False
+
+
+def _flush_output():
+    """Write out the test and monitor output buffered on stdout"""
+    sys.stdout.flush()
+
+
+def _create_monitor(config_path: str) -> PGHAMonitor:
+    """Create a monitor whose console log shares the test output buffer, keeping lines in order"""
+    monitor = PGHAMonitor(config_path)
+    logger = monitor.logger
+    for handler in list(logger.handlers):
+        # The file handler is a StreamHandler subclass and stays as it is
+        if type(handler) is logging.StreamHandler:
+            console = _ConsoleHandler(handler.formatter)
+            # Captured per task like the test output; the log file still gets every record
+            console.addFilter(_CaptureFilter(handler.formatter))
+            logger.removeHandler(handler)
+            logger.addHandler(console)
+    return monitor
 
 
-def test_database_connections(monitor: PGHAMonitor) -> bool:
+async def check_node_connection(monitor: PGHAMonitor, node_name: str) -> bool:
+    """Run an empty query on a pooled connection, or on a fresh one if the pool is unavailable"""
+    try:
+        pool = await monitor.pool(node_name)
+        if pool:
+            async with pool.acquire() as conn:
+                await monitor.ping(conn)
+            return True
+
+        # Pool creation failed; connect directly so a dead node is told apart
+        # from a pool that merely could not fill its minimum size
+        conn = await asyncpg.connect(
+            timeout=monitor.config.thresholds.connection_timeout_seconds,
+            **monitor._node_connect_kwargs(node_name)
+        )
+        try:
+            await monitor.ping(conn)
+        finally:
+            await conn.close()
+        return True
+    except _EXPECTED_ERRORS as e:
+        log.info(f"   {node_name}: {e}")
+        return False
+
+
+async def test_database_connections(monitor: PGHAMonitor) -> bool:
     """Test database connections"""
-    print("🧪 Testing database connections...")
+    log.info("🧪 Testing database connections...")
 
     try:
         # Test monitor connection
-        state = monitor.get_cluster_state()
+        state = await monitor.get_cluster_state()
         if not state:
-            print("❌ Failed to connect to pg_auto_failover monitor")
+            log.info("❌ Failed to connect to pg_auto_failover monitor")
             return False
 
-        print("✅ Monitor connection successful")
+        log.info("✅ Monitor connection successful")
 
-        # Test node connections
-        for node_name in ['primary', 'replica1', 'replica2']:
-            node_config = monitor.config['nodes'].get(node_name, {})
-            if node_config:
-                conn = monitor._get_node_connection(node_name)
-                if conn:
-                    print(f"✅ {node_name} connection successful")
-                    conn.close()
-                else:
-                    print(f"❌ {node_name} connection failed")
-                    return False
-
-        return True
+        # Test node connections concurrently; the node list comes from the
+        # config so added replicas are covered without code changes
+        node_names = tuple(monitor.config.nodes)
+        if not node_names:
+            log.info("❌ No PostgreSQL nodes configured")
+            return False
 
-    except Exception as e:
-        print(f"❌ Database connection test failed: {e}")
+        # One multi-host attempt tells whether any node is reachable at all
+        # before opening a pool per node
+        conn_kwargs = [monitor._node_connect_kwargs(node_name) for node_name in node_names]
+        try:
+            conn = await asyncpg.connect(
+                host=[kw['host'] for kw in conn_kwargs],
+                port=[kw['port'] for kw in conn_kwargs],
+                database=conn_kwargs[0]['database'],
+                user=conn_kwargs[0]['user'],
+                password=conn_kwargs[0]['password'],
+                target_session_attrs='any',
+                timeout=monitor.config.thresholds.connection_timeout_seconds
+            )
+        except _EXPECTED_ERRORS as e:
+            log.info(f"❌ No PostgreSQL node reachable: {e}")
+            return False
+        try:
+            answered = await conn.fetchval("SELECT inet_server_addr()")
+        finally:
+            await conn.close()
+        log.info(f"✅ Cluster reachable (answered by {answered or 'local socket'})")
+
+        connected = await asyncio.gather(
+            *(check_node_connection(monitor, node_name) for node_name in node_names)
+        )
+
+        all_connected = True
+        for node_name, ok in zip(node_names, connected):
+            if ok:
+                log.info(f"✅ {node_name} connection successful")
+            else:
+                log.info(f"❌ {node_name} connection failed")
+                all_connected = False
+
+        return all_connected
+
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Database connection test failed: {e}")
         return False
 
 
-def test_health_checks(monitor: PGHAMonitor) -> bool:
+async def test_health_checks(monitor: PGHAMonitor, health: Optional[ClusterHealth] = None) -> bool:
     """Test health check functionality"""
-    print("🧪 Testing health checks...")
+    log.info("🧪 Testing health checks...")
 
     try:
-        health = monitor.perform_health_check()
+        if health is None:
+            health = await monitor.perform_health_check()
 
-        print("✅ Health check completed")
-        print(f"   Primary nodes: {health.primary_count}")
-        print(f"   Replica nodes: {health.replica_count}")
-        print(f"   Unhealthy nodes: {health.unhealthy_nodes}")
-        print(f"   Failover ready: {health.failover_ready}")
+        log.info("✅ Health check completed")
+        log.info(f"   Primary nodes: {health.primary_count}")
+        log.info(f"   Replica nodes: {health.replica_count}")
+        log.info(f"   Unhealthy nodes: {health.unhealthy_nodes}")
+        log.info(f"   Failover ready: {health.failover_ready}")
 
         if health.issues:
-            print("   Issues found:")
-            for issue in health.issues:
-                print(f"   - {issue}")
+            log.info("   Issues found:\n" + "\n".join(map(_ISSUE_LINE, health.issues)))
 
         return True
 
-    except Exception as e:
-        print(f"❌ Health check test failed: {e}")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Health check test failed: {e}")
         return False
 
 
-def test_alert_system(monitor: PGHAMonitor) -> bool:
+async def test_alert_system(monitor: PGHAMonitor, health: Optional[ClusterHealth] = None) -> bool:
     """Test alert system"""
-    print("🧪 Testing alert system...")
+    log.info("🧪 Testing alert system...")
+
+    alerting = monitor.config.alerting
+    has_channel = bool(alerting.email.to_emails or alerting.webhook_urls)
 
     try:
         # Perform health check to get current state
-        health = monitor.perform_health_check()
-
-        # Check for alerts
-        alerts = monitor.check_alerts(health)
-
-        print(f"✅ Alert check completed - {len(alerts)} alerts found")
-
-        for alert in alerts:
-            print(f"   {alert['severity'].upper()}: {alert['message']}")
-
-        # Test alert sending (if configured)
-        if alerts and monitor.config['alerting']['email']['to_emails']:
-            print("🔔 Testing alert delivery...")
-            for alert in alerts[:1]:  # Test with first alert only
-                success = monitor.send_alert(alert)
-                if success:
-                    print("✅ Alert sent successfully")
-                else:
-                    print("❌ Alert sending failed")
+        if health is None:
+            health = await monitor.perform_health_check()
+
+        # Check for alerts, dropping repeats of the same severity and message
+        seen = set()
+        alerts = []
+        for alert in monitor.check_alerts(health):
+            key = (alert['severity'], alert['message'])
+            if key not in seen:
+                seen.add(key)
+                alerts.append(alert)
+
+        log.info(f"✅ Alert check completed - {len(alerts)} alerts found")
+
+        if alerts:
+            log.info("\n".join(_ALERT_LINE(alert['severity'].upper(), alert['message']) for alert in alerts))
+
+        # Test alert sending only when there is a real fault; actual delivery
+        # also needs PGHA_TEST_SEND, otherwise the no-op transport is used
+        critical = [alert for alert in alerts if alert['severity'] == 'critical']
+        if critical:
+            transport = 'configured' if os.getenv('PGHA_TEST_SEND') and has_channel else 'null'
+            log.info(f"🔔 Testing alert delivery ({transport} transport)...")
+            success = await monitor.send_alerts(critical[:1], health, transport=transport)  # Test with first alert only
+            if success:
+                log.info("✅ Alert sent successfully")
+            else:
+                log.info("❌ Alert sending failed")
 
         return True
 
-    except Exception as e:
-        print(f"❌ Alert system test failed: {e}")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Alert system test failed: {e}")
         return False
 
 
-def test_failover_validation(monitor: PGHAMonitor) -> bool:
+async def test_failover_validation(monitor: PGHAMonitor, health: Optional[ClusterHealth] = None) -> bool:
     """Test failover validation"""
-    print("🧪 Testing failover validation...")
+    log.info("🧪 Testing failover validation...")
 
     try:
-        result = monitor.test_failover()
+        result = await monitor.test_failover(health)
 
-        print("✅ Failover test completed")
-        print(f"   Success: {result['success']}")
-        print(f"   Current primary: {result.get('current_primary', 'N/A')}")
-        print(f"   Replica count: {result.get('replica_count', 0)}")
+        log.info("✅ Failover test completed")
+        log.info(f"   Success: {result['success']}")
+        log.info(f"   Current primary: {result.get('current_primary', 'N/A')}")
+        log.info(f"   Replica count: {result.get('replica_count', 0)}")
 
         if result.get('issues'):
-            print("   Issues found:")
-            for issue in result['issues']:
-                print(f"   - {issue}")
+            log.info("   Issues found:\n" + "\n".join(map(_ISSUE_LINE, result['issues'])))
 
         return result['success']
 
-    except Exception as e:
-        print(f"❌ Failover validation test failed: {e}")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Failover validation test failed: {e}")
         return False
 
 
-def test_reporting(monitor: PGHAMonitor) -> bool:
+async def test_reporting(monitor: PGHAMonitor, health: Optional[ClusterHealth] = None) -> bool:
     """Test reporting functionality"""
-    print("🧪 Testing reporting...")
+    log.info("🧪 Testing reporting...")
 
     try:
-        health = monitor.perform_health_check()
+        if health is None:
+            health = await monitor.perform_health_check()
         report = monitor.generate_report(health)
 
-        # Save report to file
-        with open('monitoring/test_report.txt', 'w') as f:
-            f.write(report)
+        # Save report to file; replaced atomically so overlapping runs never
+        # leave a truncated report behind
+        monitor._write_report(report, 'monitoring/test_report.txt')
 
-        print("✅ Report generated successfully")
-        print("   Report saved to: monitoring/test_report.txt")
-        print("   Report preview:")
-        print("=" * 50)
-        print(report[:500] + "..." if len(report) > 500 else report)
-        print("=" * 50)
+        log.info("✅ Report generated successfully")
+        log.info("   Report saved to: monitoring/test_report.txt")
+        log.info("   Report preview:")
+        log.info("=" * 50)
+        if len(report) > 500:
+            log.info("%s...", report[:500])
+        else:
+            log.info(report)
+        log.info("=" * 50)
 
         return True
 
-    except Exception as e:
-        print(f"❌ Reporting test failed: {e}")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Reporting test failed: {e}")
         return False
 
 
-def run_comprehensive_test() -> bool:
+async def run_comprehensive_test(config_path: str = DEFAULT_CONFIG) -> bool:
     """Run comprehensive test suite"""
-    print("🚀 Starting PostgreSQL HA Monitor Comprehensive Test")
-    print("=" * 60)
+    log.info("🚀 Starting PostgreSQL HA Monitor Comprehensive Test")
+    log.info("=" * 60)
 
     # Initialize monitor
     try:
-        monitor = PGHAMonitor("monitoring/config.yaml")
-        print("✅ Monitor initialized successfully")
-    except Exception as e:
-        print(f"❌ Monitor initialization failed: {e}")
+        monitor = _create_monitor(config_path)
+        log.info("✅ Monitor initialized successfully")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Monitor initialization failed: {e}")
         return False
 
-    # Test suite
-    tests = [
-        ("Database Connections", test_database_connections),
-        ("Health Checks", test_health_checks),
-        ("Alert System", test_alert_system),
-        ("Failover Validation", test_failover_validation),
-        ("Reporting", test_reporting)
-    ]
-
-    results = []
-    for test_name, test_func in tests:
-        print(f"\n📋 Running {test_name}...")
-        try:
-            result = test_func(monitor)
+    # Close the pools even when an unexpected error escapes a test
+    try:
+        # Show progress before the health check, which may wait on timeouts
+        _flush_output()
+
+        # Run the health check once and share it with every test that consumes it
+        health = await monitor.perform_health_check()
+
+        # Test suite
+        tests = [
+            ("Database Connections", test_database_connections),
+            ("Health Checks", partial(test_health_checks, health=health)),
+            ("Alert System", partial(test_alert_system, health=health)),
+            ("Failover Validation", partial(test_failover_validation, health=health)),
+            ("Reporting", partial(test_reporting, health=health))
+        ]
+
+        def record(test_name, result):
+            if isinstance(result, BaseException) and not isinstance(result, _EXPECTED_ERRORS):
+                raise result
+            if isinstance(result, Exception):
+                log.info(f"❌ {test_name} ERROR: {result}")
+                result = False
+            else:
+                result = bool(result)
+                mark, label, _ = _STATUS[result]
+                log.info(f"{mark} {test_name} {label}")
             results.append((test_name, result))
-            print(f"{'✅' if result else '❌'} {test_name} {'PASSED' if result else 'FAILED'}")
-        except Exception as e:
-            print(f"❌ {test_name} ERROR: {e}")
-            results.append((test_name, False))
+            _flush_output()
+
+        results = []
+
+        # Connectivity runs first; the remaining tests only read the shared health
+        # snapshot and are independent of each other, so they run concurrently
+        (first_name, first_func), rest = tests[0], tests[1:]
+        log.info(f"\n📋 Running {first_name}...")
+        try:
+            record(first_name, await first_func(monitor))
+        except _EXPECTED_ERRORS as e:
+            record(first_name, e)
+
+        # Without node connectivity the remaining checks would all fail the same
+        # way, so only the report is still produced
+        skipped = set()
+        if not results[0][1]:
+            skipped = {test_name for test_name, _ in rest if test_name != "Reporting"}
+        to_run = [(test_name, test_func) for test_name, test_func in rest if test_name not in skipped]
+
+        # Each test's lines are held back and written out in suite order, so
+        # concurrent tests do not interleave their output
+        outcomes = dict(zip(
+            (test_name for test_name, _ in to_run),
+            await asyncio.gather(*(_run_captured(test_func, monitor) for _, test_func in to_run))
+        ))
+        for test_name, _ in rest:
+            if test_name in skipped:
+                mark, label, _ = _STATUS[None]
+                log.info(f"{mark} {test_name} {label}")
+                results.append((test_name, None))
+                continue
+
+            result, lines = outcomes[test_name]
+            log.info(f"\n📋 Running {test_name}...")
+            for line in lines:
+                log.info(line)
+            record(test_name, result)
+    finally:
+        await monitor.close()
 
     # Summary
-    print("\n" + "=" * 60)
-    print("📊 TEST SUMMARY")
-    print("=" * 60)
+    log.info("\n" + "=" * 60)
+    log.info("📊 TEST SUMMARY")
+    log.info("=" * 60)
 
     passed = sum(1 for _, result in results if result)
     total = len(results)
 
     for test_name, result in results:
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"  {status} - {test_name}")
+        status = _STATUS[result][2]
+        log.info(f"  {status} - {test_name}")
 
-    print(f"\nOverall: {passed}/{total} tests passed")
+    log.info(f"\nOverall: {passed}/{total} tests passed")
+    _flush_output()
 
     if passed == total:
-        print("🎉 All tests passed! Monitor is ready for production.")
+        log.info("🎉 All tests passed! Monitor is ready for production.")
         return True
     else:
-        print("⚠️  Some tests failed. Please review the issues above.")
+        log.info("⚠️  Some tests failed. Please review the issues above.")
         return False
 
 
-def run_quick_test() -> bool:
-    """Run quick health check only"""
-    print("⚡ Running quick health check...")
+async def run_quick_test(config_path: str = DEFAULT_CONFIG, monitor: Optional[PGHAMonitor] = None) -> bool:
+    """Run quick health check only, reusing monitor and its connections if given"""
+    log.info(f"⚡ Running quick health check ({config_path})...")
 
     try:
-        monitor = PGHAMonitor("monitoring/config.yaml")
-        health = monitor.perform_health_check()
+        if monitor is None:
+            monitor = _create_monitor(config_path)
+            try:
+                health = await monitor.perform_health_check()
+            finally:
+                await monitor.close()
+        else:
+            health = await monitor.perform_health_check()
         report = monitor.generate_report(health)
 
-        print("✅ Quick test completed")
-        print(report)
+        log.info("✅ Quick test completed")
+        log.info(report)
 
         return health.primary_count > 0 and health.unhealthy_nodes == 0
 
-    except Exception as e:
-        print(f"❌ Quick test failed: {e}")
+    except _EXPECTED_ERRORS as e:
+        log.info(f"❌ Quick test failed: {e}")
         return False
 
 
-def main():
-    """Main test entry point"""
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+async def run_quick_test_daemon(config_path: str, interval: float):
+    """Repeat the quick test every interval seconds in one process with one monitor"""
+    monitor = _create_monitor(config_path)
+    next_tick = time.monotonic()
+    try:
+        while True:
+            await run_quick_test(config_path, monitor)
+            _flush_output()
+
+            # Fixed cadence independent of run time, without bursting after an overrun
+            next_tick = max(next_tick + interval, time.monotonic())
+            await asyncio.sleep(next_tick - time.monotonic())
+    finally:
+        await monitor.close()
 
-        if command == "comprehensive":
-            success = run_comprehensive_test()
-            sys.exit(0 if success else 1)
 
-        elif command == "quick":
-            success = run_quick_test()
-            sys.exit(0 if success else 1)
+def run_quick_test_sync(config_path: str) -> bool:
+    """Run the quick test for one cluster config in its own event loop"""
+    return asyncio.run(run_quick_test(config_path))
 
-        elif command == "health":
-            monitor = PGHAMonitor("monitoring/config.yaml")
-            health = monitor.perform_health_check()
-            print(monitor.generate_report(health))
-            sys.exit(0)
 
+def run_quick_test_captured(config_path: str) -> Tuple[bool, List[str]]:
+    """Run the quick test for one cluster config, returning its result and the lines it and its monitor logged
+
+    Used by pool workers, so reports from clusters tested in parallel can be
+    written out by the parent one cluster at a time.
+    """
+    lines = []
+    token = _captured.set(lines)
+    try:
+        return run_quick_test_sync(config_path), lines
+    finally:
+        _captured.reset(token)
+
+
+def _run(args: argparse.Namespace, configs: List[str]) -> bool:
+    """Dispatch a test command and return whether it succeeded"""
+    if args.command == "comprehensive":
+        return asyncio.run(run_comprehensive_test(configs[0]))
+
+    elif args.command == "quick":
+        if args.jobs > 1 and len(configs) > 1:
+            # Workers return their test and monitor output instead of printing it
+            results = []
+            with multiprocessing.Pool(min(args.jobs, len(configs))) as pool:
+                for ok, lines in pool.imap(run_quick_test_captured, configs):
+                    for line in lines:
+                        log.info(line)
+                    _flush_output()
+                    results.append(ok)
         else:
-            print("Usage: python test_monitor.py [comprehensive|quick|health]")
-            sys.exit(1)
-    else:
-        # Default to quick test
-        success = run_quick_test()
-        sys.exit(0 if success else 1)
+            results = []
+            for config_path in configs:
+                results.append(run_quick_test_sync(config_path))
+                _flush_output()
+        return all(results)
+
+    elif args.command == "health":
+        monitor = _create_monitor(configs[0])
+        asyncio.run(run_command(monitor, "health"))
+        return True
+
+    elif args.command == "daemon":
+        try:
+            asyncio.run(run_quick_test_daemon(configs[0], args.interval))
+        except KeyboardInterrupt:
+            pass
+        return True
+
+    return False
+
+
+def main():
+    """Main test entry point"""
+    _setup_output()
+
+    parser = argparse.ArgumentParser(description="Test the PostgreSQL HA monitor")
+    parser.add_argument('command', nargs='?', default='quick',
+                        choices=['comprehensive', 'quick', 'health', 'daemon'],
+                        help="test to run (default: quick)")
+    parser.add_argument('--config', action='append',
+                        help=f"monitor config file; repeat to quick-test several clusters (default: {DEFAULT_CONFIG})")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="number of clusters to quick-test in parallel (default: 1)")
+    parser.add_argument('--interval', type=float, default=30,
+                        help="seconds between quick tests in daemon mode (default: 30)")
+    args = parser.parse_args()
+    configs = args.config or [DEFAULT_CONFIG]
+
+    try:
+        success = _run(args, configs)
+    except Exception:
+        # Expected failures are reported by the tests themselves, so this is
+        # the single place a genuine bug surfaces, with its traceback
+        log.exception("❌ Unexpected error")
+        success = False
+    _flush_output()
+    sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()